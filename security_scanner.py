@@ -1,23 +1,145 @@
+import os
 import re
+import sys
+import string
+import ssl
+import asyncio
+import threading
+import hashlib
+import tempfile
+import functools
+import numpy as np
 import requests
-from bs4 import BeautifulSoup
+import httpx
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import validators
-from colorama import Fore, Style, init
+from cachetools import TTLCache
+from urllib.parse import urlparse
 import json
 from typing import List, Dict, Union
-import logging
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import uvicorn
-import streamlit as st
-import base64
 import io
 import csv
 import datetime
 
-# Initialize colorama for colored output
-init()
+try:
+    import re2 as re_engine
+except ImportError:  # google-re2 guarantees linear-time matching; fall back to re
+    re_engine = re
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional; literals then go through the regex engine
+    ahocorasick = None
+
+try:
+    import hyperscan
+except ImportError:  # Hyperscan is only available on some platforms; fall back to re
+    hyperscan = None
+
+# Compiled Hyperscan databases are cached here, keyed by a hash of RAW_PATTERNS
+HS_CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'shastra')
+
+# Common vulnerability patterns. The whole buffer is scanned at once, so patterns must not
+# match across lines: use [^\S\n] instead of \s and exclude \n from negated classes.
+RAW_PATTERNS = {
+    'sql_injection': [
+        # Atomic so re commits to the first FROM instead of retrying every later one
+        r'SELECT(?>[^\n]{0,512}?FROM)[^\n]{0,512}?WHERE',
+        r'INSERT[^\S\n]+INTO',
+        r'UPDATE\b[^\n]{0,256}?\bSET',
+        r'DELETE[^\S\n]+FROM',
+        r'UNION[^\S\n]+SELECT',
+    ],
+    'xss': [
+        r'<script[^>\n]{0,1000}>',  # RE2 caps counted repetition at 1000
+        r'javascript:',
+        r'onerror=',
+        r'onload=',
+        r'eval\(',
+        r'\b(?:document\.write|innerHTML|outerHTML|insertAdjacentHTML)\b',
+    ],
+    'exposed_secrets': [
+        r'api[_-]?key',
+        r'secret[_-]?key',
+        r'password',
+        r'aws[_-]?key',
+        r'credentials',
+    ],
+    'insecure_configs': [
+        r'debug[^\S\n]*=[^\S\n]*true',
+        r'ALLOW_ALL_ORIGINS',
+        r'JWT_SECRET',
+    ]
+}
+
+# str.translate table folding only ASCII letters, to match the regex engines' case-insensitivity
+ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+# Atomic groups are only kept for Python's re from 3.11; see _portable_pattern
+ATOMIC_GROUPS = re_engine is re and sys.version_info >= (3, 11)
+
+def _portable_pattern(pattern: str) -> str:
+    """Turn atomic groups into plain ones for engines without them.
+
+    RE2 and Hyperscan never backtrack, so they do not need them, and a plain group
+    still matches everything the atomic one does.
+    """
+    return pattern.replace('(?>', '(?:')
+
+# Bounded so a crafted log line cannot trigger catastrophic backtracking
+DIR_TRAVERSAL_PATTERN = r'(?i)\.\.[/\\][^\s]{0,256}\.\.[/\\]'
+
+# Finding reported for each pattern category matched by analyze_code
+CODE_FINDINGS = {
+    'sql_injection': {
+        'type': 'SQL Injection',
+        'risk_level': 'Critical',
+        'description': 'Potential SQL injection vulnerability detected. Raw SQL queries found without proper parameterization.',
+        'fix': 'Use parameterized queries or an ORM to prevent SQL injection:\n' + \
+              'cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))'
+    },
+    'xss': {
+        'type': 'Cross-Site Scripting (XSS)',
+        'risk_level': 'High',
+        'description': 'Potential XSS vulnerability. Unescaped user input could be executed as JavaScript.',
+        'fix': 'Escape all user input before rendering:\n' + \
+              'from html import escape\n' + \
+              'escaped_content = escape(user_input)'
+    },
+    'exposed_secrets': {
+        'type': 'Exposed Secrets',
+        'risk_level': 'Critical',
+        'description': 'Potential exposed secrets or credentials in code.',
+        'fix': 'Move sensitive data to environment variables:\n' + \
+              'import os\n' + \
+              'api_key = os.environ.get("API_KEY")'
+    },
+    'insecure_configs': {
+        'type': 'Security Misconfiguration',
+        'risk_level': 'High',
+        'description': 'Potential security misconfiguration detected.',
+        'fix': 'Ensure proper security configurations in production:\n' + \
+              'DEBUG = False\n' + \
+              'ALLOWED_HOSTS = ["example.com"]\n' + \
+              'CORS_ORIGIN_WHITELIST = ["https://trusted-site.com"]'
+    }
+}
+
+# Keywords that mark a matched line as already mitigated
+CODE_EXCLUSIONS = {
+    'sql_injection': ('parameterized', 'prepare'),
+    'xss': ('escape', 'sanitize'),
+}
+
+@functools.lru_cache(maxsize=4096)
+def _parse_url(url: str) -> tuple:
+    """Validate and parse a URL, returning (is_valid, parsed); repeat URLs hit the cache."""
+    return bool(validators.url(url)), urlparse(url)
 
 class SecurityScanner:
     def __init__(self):
@@ -29,187 +151,404 @@ class SecurityScanner:
             'Low': '#00FF00'        # Green
         }
         
-        # Common vulnerability patterns
-        self.patterns = {
-            'sql_injection': [
-                r'SELECT.*FROM.*WHERE',
-                r'INSERT\s+INTO',
-                r'UPDATE.*SET',
-                r'DELETE\s+FROM',
-                r'UNION\s+SELECT',
-            ],
-            'xss': [
-                r'<script.*?>',
-                r'javascript:',
-                r'onerror=',
-                r'onload=',
-                r'eval\(',
-                r'\b(?:document\.write|innerHTML|outerHTML|insertAdjacentHTML)\b',
-            ],
-            'exposed_secrets': [
-                r'api[_-]?key',
-                r'secret[_-]?key',
-                r'password',
-                r'aws[_-]?key',
-                r'credentials',
-            ],
-            'insecure_configs': [
-                r'debug\s*=\s*true',
-                r'ALLOW_ALL_ORIGINS',
-                r'JWT_SECRET',
-            ]
-        }
+        self.masters, self.masters_b = self._compile_masters(RAW_PATTERNS)
+
+        # Plain literal patterns go to an Aho-Corasick automaton, leaving the regex
+        # engine only the patterns that need it
+        self.literal_automaton = None
+        if ahocorasick:
+            literals, patterned = {}, {}
+            for category, patterns in RAW_PATTERNS.items():
+                for pattern in patterns:
+                    literal = self._literal(pattern)
+                    if literal is None:
+                        patterned.setdefault(category, []).append(pattern)
+                    else:
+                        literals[literal.lower()] = list(RAW_PATTERNS).index(category)
+            self.literal_automaton = ahocorasick.Automaton()
+            for literal, category_index in literals.items():
+                self.literal_automaton.add_word(literal, category_index)
+            self.literal_automaton.make_automaton()
+            self.pattern_masters, self.pattern_masters_b = self._compile_masters(patterned)
+
+        self.hs_db = self._build_hyperscan_db() if hyperscan else None
+        # Hyperscan scratch space cannot be shared between concurrent scans
+        self._hs_local = threading.local()
+        self.dir_traversal_re = re_engine.compile(('(?a)' if re_engine is re else '') + DIR_TRAVERSAL_PATTERN)
+
+        # Header findings per scheme://host, so repeated URL scans skip the network round trip
+        self._url_cache = TTLCache(maxsize=1024, ttl=300)
+        self._url_cache_lock = threading.Lock()
+
+        # Reuse pooled keep-alive connections across URL scans
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=64, pool_maxsize=64,
+                              max_retries=Retry(total=1, backoff_factor=0.1))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
 
     def analyze_code(self, code: str) -> List[Dict]:
         """Analyze source code for potential vulnerabilities."""
-        vulnerabilities = []
-        lines = code.split('\n')  # Split code into lines for location tracking
-        
-        # Check for SQL Injection
-        for line_number, line in enumerate(lines):
-            if any(re.search(pattern, line, re.I) for pattern in self.patterns['sql_injection']):
-                if 'parameterized' not in line.lower() and 'prepare' not in line.lower():
-                    vulnerabilities.append({
-                        'type': 'SQL Injection',
-                        'risk_level': 'Critical',
-                        'description': 'Potential SQL injection vulnerability detected. Raw SQL queries found without proper parameterization.',
-                        'location': f'Line {line_number + 1}',
-                        'fix': 'Use parameterized queries or an ORM to prevent SQL injection:\n' + \
-                              'cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))'
-                    })
-
-        # Check for XSS
-        for line_number, line in enumerate(lines):
-            if any(re.search(pattern, line, re.I) for pattern in self.patterns['xss']):
-                if 'escape' not in line.lower() and 'sanitize' not in line.lower():
-                    vulnerabilities.append({
-                        'type': 'Cross-Site Scripting (XSS)',
-                        'risk_level': 'High',
-                        'description': 'Potential XSS vulnerability. Unescaped user input could be executed as JavaScript.',
-                        'location': f'Line {line_number + 1}',
-                        'fix': 'Escape all user input before rendering:\n' + \
-                              'from html import escape\n' + \
-                              'escaped_content = escape(user_input)'
-                    })
-
-        # Check for exposed secrets
-        for line_number, line in enumerate(lines):
-            if any(re.search(pattern, line, re.I) for pattern in self.patterns['exposed_secrets']):
-                vulnerabilities.append({
-                    'type': 'Exposed Secrets',
-                    'risk_level': 'Critical',
-                    'description': 'Potential exposed secrets or credentials in code.',
-                    'location': f'Line {line_number + 1}',
-                    'fix': 'Move sensitive data to environment variables:\n' + \
-                          'import os\n' + \
-                          'api_key = os.environ.get("API_KEY")'
-                })
+        # Hyperscan only scans bytes, and RE2 only folds case ASCII-only in its Latin-1 bytes mode
+        if self.hs_db is not None or re_engine is not re:
+            return self.analyze_code_bytes(code.encode())
+        return self._analyze_buffer(code)
+
+    def analyze_code_bytes(self, data: bytes) -> List[Dict]:
+        """Analyze raw source bytes, such as an uploaded file, without decoding them first."""
+        return self._analyze_buffer(data)
+
+    def _analyze_buffer(self, text: Union[str, bytes]) -> List[Dict]:
+        """Scan a str or bytes buffer and build one finding per matched category."""
+        offsets = self._line_offsets(text)
+        if self.hs_db is not None and isinstance(text, bytes):
+            hits = self._hyperscan_hits(text, offsets)
+        else:
+            hits = self._regex_hits(text, offsets)
+
+        # Collect line numbers per category so each category is reported once
+        found = {}
+        for line_number, category in hits:
+            self._dispatch(category, line_number, text, offsets, found)
+
+        return [
+            {**CODE_FINDINGS[category], 'location': self._format_locations(found[category])}
+            for category in CODE_FINDINGS if category in found
+        ]
+
+    @staticmethod
+    def _compile_masters(patterns_by_category: Dict[str, List[str]]) -> tuple:
+        """Compile master regexes that name the matched category in a group.
+
+        Python's re gets a single regex with each group in a lookahead, so a match for one
+        category never consumes text that another category would have matched. RE2 has no
+        lookahead, so it gets one linear-time regex per category instead. The patterns are
+        ASCII, so bytes twins are returned too for scanning raw uploads without decoding them.
+        Python's re is put in ASCII mode and RE2's bytes twins in Latin-1 mode, so \b, \w and
+        case folding only know ASCII on every path, as with Hyperscan.
+        """
+        if not ATOMIC_GROUPS:
+            patterns_by_category = {category: [_portable_pattern(pattern) for pattern in patterns]
+                                    for category, patterns in patterns_by_category.items()}
+        if re_engine is re:
+            master_patterns = ['(?ai)' + '|'.join(
+                f'(?=(?P<{category}>{"|".join(patterns)}))'
+                for category, patterns in patterns_by_category.items()
+            )]
+            return ([re.compile(pattern) for pattern in master_patterns],
+                    [re.compile(pattern.encode()) for pattern in master_patterns])
+        master_patterns = [
+            f'(?i)(?P<{category}>{"|".join(patterns)})'
+            for category, patterns in patterns_by_category.items()
+        ]
+        # RE2 folds case with Unicode rules for UTF-8, so the Kelvin sign would match 'k'
+        latin1 = re_engine.Options()
+        latin1.encoding = re_engine.Options.Encoding.LATIN1
+        return ([re_engine.compile(pattern) for pattern in master_patterns],
+                [re_engine.compile(pattern.encode(), options=latin1) for pattern in master_patterns])
+
+    @staticmethod
+    def _literal(pattern: str) -> Union[str, None]:
+        """Return the text a pattern matches if it is a plain literal, otherwise None."""
+        bare = re.sub(r'\\[^\w\s]', '', pattern)  # Escaped punctuation such as \( is literal
+        if re.search(r'[.^$*+?{}\[\]|()\\]', bare):
+            return None
+        return re.sub(r'\\([^\w\s])', r'\1', pattern)
+
+    def _regex_hits(self, code: Union[str, bytes], offsets: np.ndarray) -> List[tuple]:
+        """Return the (line_number, category) pairs found by the master regexes, in line order."""
+        # RE2 names the groups of a bytes pattern with bytes
+        category_index = {name: index for index, category in enumerate(RAW_PATTERNS)
+                          for name in (category, category.encode())}
+        is_bytes = isinstance(code, bytes)
+        masters = self.masters_b if is_bytes else self.masters
+        starts, categories = [], []
+        if self.literal_automaton is not None:
+            # Fold ASCII only, like the regex engines: bytes.lower() does, and latin-1 maps bytes
+            # 1:1; str.lower() would also fold non-ASCII text such as the Kelvin sign into 'k'
+            lowered = code.lower().decode('latin-1') if is_bytes else code.translate(ASCII_LOWER)
+            for end, category in self.literal_automaton.iter(lowered):
+                starts.append(end)
+                categories.append(category)
+            masters = self.pattern_masters_b if is_bytes else self.pattern_masters
+        for master in masters:
+            for match in master.finditer(code):
+                starts.append(match.start())
+                categories.append(category_index[match.lastgroup])
+        return self._line_hits(offsets, starts, categories)
+
+    @staticmethod
+    def _line_hits(offsets: np.ndarray, positions: List[int], categories: List[int]) -> List[tuple]:
+        """Map match positions to unique (line_number, category) pairs, sorted by line.
+
+        Line numbers for all matches come from one searchsorted call, and encoding each
+        pair as a single integer lets np.unique dedupe and sort them in one step.
+        """
+        category_order = list(RAW_PATTERNS)
+        line_numbers = np.searchsorted(offsets, np.asarray(positions, dtype=np.int64), side='right')
+        keys = np.unique(line_numbers * len(category_order) + np.asarray(categories, dtype=np.int64))
+        return [(key // len(category_order), category_order[key % len(category_order)])
+                for key in keys.tolist()]
 
-        # Check for security misconfigurations
-        for line_number, line in enumerate(lines):
-            if any(re.search(pattern, line, re.I) for pattern in self.patterns['insecure_configs']):
-                vulnerabilities.append({
-                    'type': 'Security Misconfiguration',
-                    'risk_level': 'High',
-                    'description': 'Potential security misconfiguration detected.',
-                    'location': f'Line {line_number + 1}',
-                    'fix': 'Ensure proper security configurations in production:\n' + \
-                          'DEBUG = False\n' + \
-                          'ALLOWED_HOSTS = ["example.com"]\n' + \
-                          'CORS_ORIGIN_WHITELIST = ["https://trusted-site.com"]'
-                })
+    def _build_hyperscan_db(self):
+        """Load the Hyperscan database for every pattern from disk, compiling it on a cache miss.
 
-        return vulnerabilities
+        Pattern ids index hs_categories.
+        """
+        self.hs_categories = [index for index, patterns in enumerate(RAW_PATTERNS.values()) for _ in patterns]
+        expressions = [_portable_pattern(pattern).encode() for patterns in RAW_PATTERNS.values() for pattern in patterns]
+        ids = list(range(len(expressions)))
+        flags = [hyperscan.HS_FLAG_CASELESS] * len(expressions)
+
+        # Key the cache on the exact, ordered compile inputs: ids map to categories by position
+        compile_inputs = [hyperscan.__version__, *zip((expression.decode() for expression in expressions), ids, flags)]
+        rules_hash = hashlib.sha256(json.dumps(compile_inputs).encode()).hexdigest()
+        cache_path = os.path.join(HS_CACHE_DIR, f'rules-{rules_hash}.hsdb')
+        try:
+            with open(cache_path, 'rb') as f:
+                return hyperscan.loadb(f.read(), hyperscan.HS_MODE_BLOCK)
+        except (OSError, hyperscan.HyperscanError):
+            # Missing, unreadable, or built by an incompatible Hyperscan version
+            pass
+
+        db = hyperscan.Database()
+        db.compile(expressions=expressions, ids=ids, elements=len(expressions), flags=flags)
+
+        # The cache is best effort; write atomically so concurrent workers never read a partial file
+        try:
+            os.makedirs(HS_CACHE_DIR, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=HS_CACHE_DIR, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(hyperscan.dumpb(db))
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+        return db
+
+    def _hyperscan_hits(self, data: bytes, offsets: np.ndarray) -> List[tuple]:
+        """Return the (line_number, category) pairs found by one Hyperscan pass over the buffer."""
+        ends, categories = [], []
+
+        # Without SOM flags Hyperscan only reports where a match ends; patterns never span
+        # lines, so the last matched byte is on the same line the match starts on
+        def on_match(pattern_id, start, end, flags, context):
+            ends.append(end - 1)
+            categories.append(self.hs_categories[pattern_id])
+
+        scratch = getattr(self._hs_local, 'scratch', None)
+        if scratch is None:
+            scratch = self._hs_local.scratch = hyperscan.Scratch(self.hs_db)
+        self.hs_db.scan(data, match_event_handler=on_match, scratch=scratch)
+        return self._line_hits(offsets, ends, categories)
+
+    @staticmethod
+    def _line_offsets(text: Union[str, bytes]) -> np.ndarray:
+        """Return the position of every newline in text, in the units text is indexed by."""
+        if isinstance(text, bytes):
+            buffer = np.frombuffer(text, dtype=np.uint8)
+        elif text.isascii():
+            buffer = np.frombuffer(text.encode('ascii'), dtype=np.uint8)
+        else:
+            # UTF-32 keeps one array element per character so offsets match str indices
+            buffer = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+        return np.flatnonzero(buffer == 0x0A)
+
+    def _dispatch(self, category: str, line_number: int, text: Union[str, bytes],
+                  offsets: np.ndarray, found: Dict[str, List[int]]):
+        """Record the line of a matched category unless the line shows it is mitigated."""
+        exclusions = CODE_EXCLUSIONS.get(category)
+        if exclusions:
+            # Only categories with mitigation keywords need the line text
+            line = self._line_at(text, offsets, line_number).lower()
+            if any(word in line for word in exclusions):
+                return
+        found.setdefault(category, []).append(line_number + 1)
+
+    @staticmethod
+    def _format_locations(line_numbers: List[int], limit: int = 10) -> str:
+        """Format the line numbers of a finding, listing at most limit of them."""
+        if len(line_numbers) == 1:
+            return f'Line {line_numbers[0]}'
+        location = f"Lines {', '.join(map(str, line_numbers[:limit]))}"
+        if len(line_numbers) > limit:
+            location += f' (+{len(line_numbers) - limit} more)'
+        return location
+
+    @staticmethod
+    def _line_at(text: Union[str, bytes], offsets: np.ndarray, line_number: int) -> str:
+        """Slice a single zero-based line out of text using its newline offsets."""
+        start = offsets[line_number - 1] + 1 if line_number else 0
+        end = offsets[line_number] if line_number < len(offsets) else len(text)
+        line = text[start:end]
+        return line.decode(errors='replace') if isinstance(line, bytes) else line
 
     def analyze_url(self, url: str) -> List[Dict]:
         """Analyze a URL for potential vulnerabilities."""
-        if not validators.url(url):
-            return [{'type': 'Invalid URL', 'risk_level': 'Low', 
-                    'description': 'The provided URL is not valid.'}]
+        is_valid, parsed = _parse_url(url)
+        if not is_valid:
+            return [self._invalid_url()]
 
         vulnerabilities = []
+        origin = f'{parsed.scheme}://{parsed.netloc}'
         try:
-            response = requests.get(url, timeout=10, verify=True)
-            headers = response.headers
-
-            # Check for missing security headers
-            security_headers = {
-                'Strict-Transport-Security': 'Missing HSTS header',
-                'X-Content-Type-Options': 'Missing X-Content-Type-Options header',
-                'X-Frame-Options': 'Missing X-Frame-Options header',
-                'Content-Security-Policy': 'Missing Content Security Policy'
-            }
-
-            for header, message in security_headers.items():
-                if header not in headers:
-                    vulnerabilities.append({
-                        'type': 'Missing Security Headers',
-                        'risk_level': 'Medium',
-                        'description': message,
-                        'fix': f'Add the {header} header to your server responses'
-                    })
-
-            # Check for SSL/TLS configuration
-            if url.startswith('http://'):
-                vulnerabilities.append({
-                    'type': 'Insecure Protocol',
-                    'risk_level': 'High',
-                    'description': 'Website is using HTTP instead of HTTPS',
-                    'fix': 'Implement HTTPS using a valid SSL/TLS certificate'
-                })
+            with self._url_cache_lock:
+                header_findings = self._url_cache.get(origin)
+            if header_findings is None:
+                # Only headers are inspected, so skip the body with HEAD
+                response = self.session.head(url, timeout=10, verify=True, allow_redirects=True)
+                if response.status_code in (405, 501):
+                    # Server does not support HEAD; stream the GET and close before reading the body
+                    response = self.session.get(url, timeout=10, verify=True, stream=True)
+                    response.close()
+                header_findings = self._analyze_headers(response.headers)
+                with self._url_cache_lock:
+                    self._url_cache[origin] = header_findings
+            vulnerabilities.extend(header_findings)
+            vulnerabilities.extend(self._analyze_protocol(parsed.scheme))
 
         except requests.exceptions.SSLError:
-            vulnerabilities.append({
-                'type': 'SSL/TLS Error',
-                'risk_level': 'Critical',
-                'description': 'SSL/TLS certificate validation failed',
-                'fix': 'Ensure a valid SSL certificate is properly installed'
-            })
+            vulnerabilities.append(self._ssl_error())
         except requests.exceptions.RequestException as e:
-            vulnerabilities.append({
-                'type': 'Connection Error',
-                'risk_level': 'Low',
-                'description': f'Error connecting to URL: {str(e)}'
-            })
+            vulnerabilities.append(self._connection_error(e))
+
+        return vulnerabilities
+
+    async def analyze_url_async(self, client: httpx.AsyncClient, url: str) -> List[Dict]:
+        """Analyze a URL for potential vulnerabilities using a shared async HTTP client."""
+        is_valid, parsed = _parse_url(url)
+        if not is_valid:
+            return [self._invalid_url()]
+
+        vulnerabilities = []
+        origin = f'{parsed.scheme}://{parsed.netloc}'
+        try:
+            with self._url_cache_lock:
+                header_findings = self._url_cache.get(origin)
+            if header_findings is None:
+                response = await client.head(url)
+                if response.status_code in (405, 501):
+                    # Leaving the stream context closes the response before the body is read
+                    async with client.stream('GET', url) as response:
+                        pass
+                header_findings = self._analyze_headers(response.headers)
+                with self._url_cache_lock:
+                    self._url_cache[origin] = header_findings
+            vulnerabilities.extend(header_findings)
+            vulnerabilities.extend(self._analyze_protocol(parsed.scheme))
+
+        except httpx.HTTPError as e:
+            vulnerabilities.append(self._ssl_error() if self._is_ssl_error(e) else self._connection_error(e))
+        except (httpx.InvalidURL, ValueError) as e:
+            # Not HTTPErrors; raised for URLs validators accepts but httpx rejects, such as overlong
+            # URLs (InvalidURL) or hosts that fail IDNA encoding (idna errors are ValueErrors)
+            vulnerabilities.append(self._connection_error(e))
 
         return vulnerabilities
 
+    @staticmethod
+    def _analyze_headers(headers) -> List[Dict]:
+        """Check already-fetched response headers for missing security headers."""
+        security_headers = {
+            'Strict-Transport-Security': 'Missing HSTS header',
+            'X-Content-Type-Options': 'Missing X-Content-Type-Options header',
+            'X-Frame-Options': 'Missing X-Frame-Options header',
+            'Content-Security-Policy': 'Missing Content Security Policy'
+        }
+
+        vulnerabilities = []
+        for header, message in security_headers.items():
+            if header not in headers:
+                vulnerabilities.append({
+                    'type': 'Missing Security Headers',
+                    'risk_level': 'Medium',
+                    'description': message,
+                    'fix': f'Add the {header} header to your server responses'
+                })
+        return vulnerabilities
+
+    @staticmethod
+    def _analyze_protocol(scheme: str) -> List[Dict]:
+        """Check for SSL/TLS configuration."""
+        if scheme == 'http':
+            return [{
+                'type': 'Insecure Protocol',
+                'risk_level': 'High',
+                'description': 'Website is using HTTP instead of HTTPS',
+                'fix': 'Implement HTTPS using a valid SSL/TLS certificate'
+            }]
+        return []
+
+    @staticmethod
+    def _is_ssl_error(error: BaseException) -> bool:
+        """Return True if an httpx error was caused by a failed TLS handshake."""
+        while error is not None:
+            if isinstance(error, ssl.SSLError):
+                return True
+            error = error.__cause__ or error.__context__
+        return False
+
+    @staticmethod
+    def _invalid_url() -> Dict:
+        return {'type': 'Invalid URL', 'risk_level': 'Low',
+                'description': 'The provided URL is not valid.'}
+
+    @staticmethod
+    def _ssl_error() -> Dict:
+        return {
+            'type': 'SSL/TLS Error',
+            'risk_level': 'Critical',
+            'description': 'SSL/TLS certificate validation failed',
+            'fix': 'Ensure a valid SSL certificate is properly installed'
+        }
+
+    @staticmethod
+    def _connection_error(error: Exception) -> Dict:
+        return {
+            'type': 'Connection Error',
+            'risk_level': 'Low',
+            'description': f'Error connecting to URL: {str(error) or type(error).__name__}'
+        }
+
     def analyze_logs(self, logs: str) -> List[Dict]:
         """Analyze logs for vulnerabilities and return a list of findings."""
         vulnerabilities = []
         # Example detection pattern for directory traversal
-        pattern = r'(?i)\.\..*?\.\..*?'
-        matches = re.finditer(pattern, logs)
-        for match in matches:
+        matches = list(self.dir_traversal_re.finditer(logs))
+        if matches:
+            offsets = self._line_offsets(logs)
+            starts = np.fromiter((match.start() for match in matches), dtype=np.int64, count=len(matches))
+            # Keep the first match on each line so the location still shows what was matched
+            line_numbers, first = np.unique(np.searchsorted(offsets, starts, side='right'), return_index=True)
+            snippets = [f'Line {line_number + 1}: {matches[index].group()}'
+                        for line_number, index in zip(line_numbers.tolist(), first.tolist())]
+            location = '; '.join(snippets[:10])
+            if len(snippets) > 10:
+                location += f' (+{len(snippets) - 10} more)'
             vulnerabilities.append({
                 'type': 'Directory Traversal',
                 'risk_level': 'High',
                 'description': 'Suspicious pattern detected in logs indicating potential directory traversal attack.',
                 'fix': 'Implement input validation and WAF rules',
-                'location': f"Line {logs.count('\n', 0, match.start()) + 1}: {match.group()}"
+                'location': location
             })
         return vulnerabilities
 
-    def print_results(self, vulnerabilities: List[Dict]):
-        """Print vulnerability scan results in a formatted way."""
+    def print_results(self, vulnerabilities: List[Dict], st):
+        """Print vulnerability scan results in a formatted way.
+
+        st is the Streamlit module (or any object exposing the same calls) to render with,
+        so the scanner itself does not depend on Streamlit.
+        """
         if not vulnerabilities:
             st.success("✅ No vulnerabilities detected!")
             return
 
-        # Remove duplicates
-        unique_vulnerabilities = []
-        seen_types = set()
-        for vuln in vulnerabilities:
-            if vuln['type'] not in seen_types:
-                unique_vulnerabilities.append(vuln)
-                seen_types.add(vuln['type'])
-
         # Display summary
-        total_vulns = len(unique_vulnerabilities)
-        critical = sum(1 for v in unique_vulnerabilities if v['risk_level'] == 'Critical')
-        high = sum(1 for v in unique_vulnerabilities if v['risk_level'] == 'High')
-        medium = sum(1 for v in unique_vulnerabilities if v['risk_level'] == 'Medium')
-        low = sum(1 for v in unique_vulnerabilities if v['risk_level'] == 'Low')
+        total_vulns = len(vulnerabilities)
+        critical = sum(1 for v in vulnerabilities if v['risk_level'] == 'Critical')
+        high = sum(1 for v in vulnerabilities if v['risk_level'] == 'High')
+        medium = sum(1 for v in vulnerabilities if v['risk_level'] == 'Medium')
+        low = sum(1 for v in vulnerabilities if v['risk_level'] == 'Low')
 
         st.markdown("""
             <div class='report-container'>
@@ -241,7 +580,7 @@ class SecurityScanner:
 
         # Display each vulnerability with its risk level
         st.markdown("### Detailed Analysis")
-        for vuln in unique_vulnerabilities:
+        for vuln in vulnerabilities:
             risk_level = vuln['risk_level']
             color = self.risk_colors.get(risk_level, '#CCCCCC')
             
@@ -270,34 +609,36 @@ class SecurityScanner:
         """, unsafe_allow_html=True)
         
         col1, col2, col3 = st.columns(3)
+        # Share one timestamp so all three downloads carry the same file name suffix
+        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
         
         with col1:
             # Generate HTML report
-            html_report = self.generate_html_report(unique_vulnerabilities)
+            html_report = self.generate_html_report(vulnerabilities)
             st.download_button(
                 label="📄 Download HTML Report",
                 data=html_report,
-                file_name=f"vulnerability_report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.html",
+                file_name=f"vulnerability_report_{timestamp}.html",
                 mime="text/html"
             )
         
         with col2:
             # Generate CSV report
-            csv_report = self.generate_csv_report(unique_vulnerabilities)
+            csv_report = self.generate_csv_report(vulnerabilities)
             st.download_button(
                 label="📊 Download CSV Report",
                 data=csv_report,
-                file_name=f"vulnerability_report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                file_name=f"vulnerability_report_{timestamp}.csv",
                 mime="text/csv"
             )
             
         with col3:
             # Generate bug report
-            bug_report = self.generate_bug_report(unique_vulnerabilities)
+            bug_report = self.generate_bug_report(vulnerabilities)
             st.download_button(
                 label="🐛 Download Bug Report",
                 data=bug_report,
-                file_name=f"bug_report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.md",
+                file_name=f"bug_report_{timestamp}.md",
                 mime="text/markdown"
             )
 
@@ -305,7 +646,10 @@ class SecurityScanner:
         """Generate an HTML report of the vulnerabilities."""
         current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-        html = f"""
+        # Text color that stays readable on each risk level's badge color
+        text_colors = {level: 'black' if level in ('Medium', 'Low') else 'white' for level in self.risk_colors}
+
+        parts = [f"""
         <!DOCTYPE html>
         <html>
         <head>
@@ -337,75 +681,88 @@ class SecurityScanner:
             </div>
             
             <h2>Detected Vulnerabilities</h2>
-        """
+        """]
         
         for vuln in vulnerabilities:
             risk_level = vuln['risk_level'].lower()
-            html += f"""
+            parts.append(f"""
             <div class="vulnerability">
-                <div class="risk-label {risk_level}" style="background-color: {self.risk_colors[vuln['risk_level']]}; color: {'black' if risk_level in ['medium', 'low'] else 'white'};">
+                <div class="risk-label {risk_level}" style="background-color: {self.risk_colors[vuln['risk_level']]}; color: {text_colors[vuln['risk_level']]};">
                     {vuln['risk_level']}
                 </div>
                 <h3>{vuln['type']}</h3>
                 <p><strong>Description:</strong> {vuln['description']}</p>
-            """
+            """)
             
             if 'fix' in vuln:
-                html += f"""
+                parts.append(f"""
                 <p><strong>Recommended Fix:</strong></p>
                 <pre>{vuln['fix']}</pre>
-                """
+                """)
             
             if 'location' in vuln:
-                html += f"""
+                parts.append(f"""
                 <p><strong>Location:</strong> {vuln['location']}</p>
-                """
+                """)
             
-            html += "</div>"
+            parts.append("</div>")
         
-        html += """
+        parts.append("""
         </body>
         </html>
-        """
+        """)
         
-        return html
+        return ''.join(parts)
     
-    def generate_csv_report(self, vulnerabilities: List[Dict]) -> str:
-        """Generate a CSV report of the vulnerabilities."""
-        output = io.StringIO()
-        writer = csv.writer(output, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
-        
-        # Write header with clear column names
-        writer.writerow([
+    def generate_csv_report(self, vulnerabilities: List[Dict], use_csv_module: bool = False) -> str:
+        """Generate a CSV report of the vulnerabilities.
+
+        Rows are joined directly with every field quoted; pass use_csv_module=True to
+        go through csv.writer instead.
+        """
+        header = [
             'Risk Level',
             'Vulnerability Type',
             'Description',
             'Recommended Fix',
             'Location'
-        ])
-        
-        # Write vulnerabilities with proper formatting
-        for vuln in vulnerabilities:
-            writer.writerow([
+        ]
+        rows = [
+            [
                 vuln['risk_level'].upper(),
                 vuln['type'],
                 vuln['description'].replace('\n', ' '),  # Remove line breaks in description
                 vuln.get('fix', '').replace('\n', ' '),   # Remove line breaks in fix
                 vuln.get('location', '')                  # Add location if available
-            ])
-        
-        return output.getvalue()
+            ]
+            for vuln in vulnerabilities
+        ]
+
+        if use_csv_module:
+            output = io.StringIO()
+            writer = csv.writer(output, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+            writer.writerow(header)
+            writer.writerows(rows)
+            return output.getvalue()
+
+        # Same CRLF row terminator as csv.writer
+        return ''.join(','.join(map(self._csv_quote, row)) + '\r\n' for row in [header, *rows])
+
+    @staticmethod
+    def _csv_quote(field: str) -> str:
+        """Quote a CSV field, doubling any embedded quotes."""
+        return '"' + field.replace('"', '""') + '"'
 
     def generate_bug_report(self, vulnerabilities: List[Dict]) -> str:
         """Generate a bug report from the detected vulnerabilities."""
-        report = "# Bug Report\n\n"
+        parts = ["# Bug Report\n\n"]
         for vuln in vulnerabilities:
-            report += f"## {vuln['type']}\n"
-            report += f"**Risk Level:** {vuln['risk_level']}\n"
-            report += f"**Description:** {vuln['description']}\n"
-            report += f"**Recommended Fix:** {vuln.get('fix', '')}\n"
-            report += f"**Location:** {vuln.get('location', '')}\n\n"
-        return report
+            parts.append(f"## {vuln['type']}\n")
+            parts.append(f"**Risk Level:** {vuln['risk_level']}\n")
+            parts.append(f"**Description:** {vuln['description']}\n")
+            parts.append(f"**Recommended Fix:** {vuln.get('fix', '')}\n")
+            parts.append(f"**Location:** {vuln.get('location', '')}\n\n")
+        return ''.join(parts)
 
 # Create FastAPI app
 app = FastAPI()
@@ -426,6 +783,12 @@ class CodeScanRequest(BaseModel):
 class URLScanRequest(BaseModel):
     url: str
 
+# Largest batch accepted by /api/scan/urls
+MAX_BATCH_URLS = 500
+
+class URLsScanRequest(BaseModel):
+    urls: List[str]
+
 class LogScanRequest(BaseModel):
     logs: str
 
@@ -433,7 +796,7 @@ class LogScanRequest(BaseModel):
 scanner = SecurityScanner()
 
 @app.post("/api/scan/code")
-async def scan_code(request: CodeScanRequest):
+def scan_code(request: CodeScanRequest):
     """Analyze source code for security vulnerabilities"""
     try:
         return scanner.analyze_code(request.code)
@@ -441,15 +804,30 @@ async def scan_code(request: CodeScanRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/scan/url")
-async def scan_url(request: URLScanRequest):
+def scan_url(request: URLScanRequest):
     """Analyze URL for security vulnerabilities"""
     try:
         return scanner.analyze_url(request.url)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/scan/urls")
+async def scan_urls(request: URLsScanRequest):
+    """Analyze several URLs concurrently for security vulnerabilities"""
+    if len(request.urls) > MAX_BATCH_URLS:
+        raise HTTPException(status_code=400, detail=f'At most {MAX_BATCH_URLS} URLs can be scanned per request')
+    try:
+        limits = httpx.Limits(max_connections=64, max_keepalive_connections=64)
+        # No pool timeout: URLs beyond the connection limit queue instead of failing
+        timeout = httpx.Timeout(10, pool=None)
+        async with httpx.AsyncClient(http2=True, timeout=timeout, follow_redirects=True, limits=limits) as client:
+            results = await asyncio.gather(*[scanner.analyze_url_async(client, url) for url in request.urls])
+        return [{'url': url, 'vulnerabilities': result} for url, result in zip(request.urls, results)]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/scan/logs")
-async def scan_logs(request: LogScanRequest):
+def scan_logs(request: LogScanRequest):
     """Analyze logs for security vulnerabilities"""
     try:
         return scanner.analyze_logs(request.logs)
@@ -457,6 +835,9 @@ async def scan_logs(request: LogScanRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 def main():
+    # Imported here so API workers never load Streamlit
+    import streamlit as st
+
     # Set page configuration
     st.set_page_config(
         page_title="SHASTRA - Security Vulnerability Scanner",
@@ -529,9 +910,11 @@ def main():
                 if st.button("🔍 Analyze Code", key="analyze_code"):
                     with st.spinner("Analyzing code for vulnerabilities..."):
                         if code_file:
-                            code_input = code_file.getvalue().decode()
-                        vulnerabilities = scanner.analyze_code(code_input)
-                        scanner.print_results(vulnerabilities)
+                            # Scan the upload as raw bytes, skipping the decode pass
+                            vulnerabilities = scanner.analyze_code_bytes(code_file.getvalue())
+                        else:
+                            vulnerabilities = scanner.analyze_code(code_input)
+                        scanner.print_results(vulnerabilities, st)
 
     with tab2:
         st.markdown("### Analyze URL")
@@ -541,7 +924,7 @@ def main():
             if st.button("🔍 Analyze URL", key="analyze_url"):
                 with st.spinner("Analyzing URL for vulnerabilities..."):
                     vulnerabilities = scanner.analyze_url(url_input)
-                    scanner.print_results(vulnerabilities)
+                    scanner.print_results(vulnerabilities, st)
 
     with tab3:
         st.markdown("### Analyze Logs")
@@ -557,7 +940,7 @@ def main():
                         if logs_file:
                             logs_input = logs_file.getvalue().decode()
                         vulnerabilities = scanner.analyze_logs(logs_input)
-                        scanner.print_results(vulnerabilities)
+                        scanner.print_results(vulnerabilities, st)
 
     # Footer
     st.markdown("---")
@@ -568,4 +951,5 @@ def main():
     """, unsafe_allow_html=True)
 
 if __name__ == '__main__':
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Multiple workers require the app as an import string
+    uvicorn.run("security_scanner:app", host="0.0.0.0", port=8000, workers=os.cpu_count())